@@ -7,20 +7,132 @@ Runs SU2 simulations on all meshes in a validation case configuration
 import os
 import sys
 import argparse
+import shlex
 import subprocess
 import shutil
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-def run_command(cmd, cwd=None):
-    """Run a shell command and return the result"""
+# Threads given to each SU2_CFD run; the CI build is serial, hence the default of 1
+SU2_THREADS_PER_RUN = max(1, int(os.environ.get('SU2_THREADS', 1)))
+
+# Seconds between progress messages while a long command is running
+HEARTBEAT_INTERVAL = 60
+
+# Number of log lines echoed when a monitored command fails
+LOG_TAIL_LINES = 20
+
+# File extensions picked up from mesh/restart downloads and simulation output
+MESH_EXTENSIONS = ('.su2',)
+RESTART_EXTENSIONS = ('.dat',)
+RESULT_EXTENSIONS = ('.csv', '.vtu', '.cfg', '.dat', '.su2', '.log')
+
+# Written in a mesh folder after SU2 finishes successfully there; it records
+# the size and mtime of SU2_OUTPUT_FILES so deleted or replaced output is noticed
+SU2_DONE_MARKER = ".su2_done"
+SU2_OUTPUT_FILES = ("vol_solution.vtu", "restart.dat")
+
+def kill_process_group(process):
+    """Kill a command started in its own session together with its children"""
     try:
-        result = subprocess.run(cmd, shell=True, cwd=cwd, 
-                              capture_output=True, text=True, check=True)
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        print(f"Error running command: {cmd}")
-        print(f"Error: {e.stderr}")
-        return None
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+def run_monitored_command(cmd, log_path, cwd=None, timeout=None, env=None, abort=None):
+    """Run a command given as an argument list with its output streamed to a
+    log file, reporting progress and enforcing an optional timeout. The
+    command is killed early if the optional abort event gets set, in which
+    case None is returned instead of False"""
+    with open(log_path, 'w') as log_file:
+        # The child writes straight to disk, so its output is never buffered here
+        try:
+            # A session of its own lets a timeout or abort also kill anything the
+            # command spawned (e.g. SU2_CFD launched through a wrapper script)
+            process = subprocess.Popen(cmd, cwd=cwd, env=env, start_new_session=True,
+                                       stdout=log_file, stderr=subprocess.STDOUT)
+        except OSError as e:
+            print(f"Error running command: {shlex.join(cmd)}")
+            print(f"Error: {e}")
+            return False
+        start = last_heartbeat = time.monotonic()
+        poll_interval = 0.01
+        
+        while True:
+            try:
+                process.wait(timeout=poll_interval)
+                break
+            except subprocess.TimeoutExpired:
+                now = time.monotonic()
+                if timeout is not None and now - start > timeout:
+                    kill_process_group(process)
+                    print(f"Command timed out after {timeout}s: {shlex.join(cmd)}")
+                    return False
+                if abort is not None and abort.is_set():
+                    kill_process_group(process)
+                    print(f"Command cancelled: {shlex.join(cmd)}")
+                    return None
+                if now - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    print(f"  Still running in {cwd} ({int(now - start)}s elapsed)")
+                    last_heartbeat = now
+                # Back off so long runs are not polled in a tight loop
+                poll_interval = min(poll_interval * 2, 1.0)
+    
+    if process.returncode != 0:
+        print(f"Error running command: {shlex.join(cmd)}")
+        with open(log_path, 'r', errors='replace') as log_file:
+            tail = deque(log_file, maxlen=LOG_TAIL_LINES)
+        print(f"Last lines of {log_path}:")
+        print("".join(tail), end="")
+        return False
+    return True
+
+def fast_copy(src, dst, preserve_metadata=True):
+    """Hard-link a file into place, falling back to a regular copy"""
+    dst = Path(dst)
+    if dst.is_dir():
+        dst = dst / Path(src).name
+    
+    try:
+        # A link is O(1) regardless of file size; replace any stale copy first
+        if os.path.lexists(dst):
+            dst.unlink()
+        os.link(src, dst)
+    except OSError:
+        # Different filesystem or no hard-link support. copyfile() keeps the
+        # data in the kernel (sendfile); copy2() adds a copystat() on top
+        if preserve_metadata:
+            shutil.copy2(src, dst)
+        else:
+            shutil.copyfile(src, dst)
+
+def copy_detached(src, dst_dir):
+    """Copy a file into a folder as an independent copy, never through a link"""
+    dst = Path(dst_dir) / Path(src).name
+    # Writing into an existing hard link would also change every other name
+    # for that file, e.g. results collected by an earlier run
+    if os.path.lexists(dst):
+        dst.unlink()
+    shutil.copyfile(src, dst)
+
+def list_files(folder, extensions):
+    """List the files in a folder ending with any of the given extensions"""
+    # A single scandir pass replaces one glob (full directory read) per pattern
+    with os.scandir(folder) as entries:
+        return [Path(entry.path) for entry in entries
+                if entry.name.endswith(extensions) and entry.is_file()]
+
+def iter_mesh_dirs(path):
+    """List the mesh folders (non-hidden subdirectories) of a path"""
+    # DirEntry.is_dir() reuses the type from the directory listing, no extra stat
+    with os.scandir(path) as entries:
+        return [Path(entry.path) for entry in entries
+                if entry.is_dir() and not entry.name.startswith('.')]
 
 def copy_files_mesh(mesh_path, main_path, config_name):
     """Copy mesh files to main repo"""
@@ -35,26 +147,29 @@ def copy_files_mesh(mesh_path, main_path, config_name):
         print(f"Main path not found: {main_config_path}")
         return False
     
+    # List the target folders once instead of probing each one with exists()
+    target_names = {folder.name for folder in iter_mesh_dirs(main_config_path)}
+    
     # Find all mesh folders
-    for mesh_folder in mesh_config_path.iterdir():
-        if mesh_folder.is_dir() and not mesh_folder.name.startswith('.'):
-            target_mesh_folder = main_config_path / mesh_folder.name
+    for mesh_folder in iter_mesh_dirs(mesh_config_path):
+        target_mesh_folder = main_config_path / mesh_folder.name
+        
+        if mesh_folder.name in target_names:
+            print(f"Copying files to {target_mesh_folder}")
             
-            if target_mesh_folder.exists():
-                print(f"Copying files to {target_mesh_folder}")
-                
-                # Copy mesh file
-                mesh_files = list(mesh_folder.glob("*.su2"))
-                for mesh_file in mesh_files:
-                    shutil.copy2(mesh_file, target_mesh_folder)
-            else: 
-                print(f"Error: Target folder does not exist — {target_mesh_folder}") 
-                return False
+            # Copy mesh file
+            mesh_files = list_files(mesh_folder, MESH_EXTENSIONS)
+            for mesh_file in mesh_files:
+                fast_copy(mesh_file, target_mesh_folder)
+        else: 
+            print(f"Error: Target folder does not exist — {target_mesh_folder}") 
+            return False
     
     return True
 
-def copy_files_restart(restart_path, main_path, config_name):
-    """Copy restart files to main repo"""
+def copy_files_restart(restart_path, main_path, config_name, keep_names=()):
+    """Copy restart files to main repo, leaving the mesh folders named in
+    keep_names untouched"""
     restart_config_path = Path(restart_path) / config_name
     main_config_path = Path(main_path) / config_name
 
@@ -66,21 +181,26 @@ def copy_files_restart(restart_path, main_path, config_name):
         print(f"Main path not found: {main_config_path}")
         return False
     
+    # List the target folders once instead of probing each one with exists()
+    target_names = {folder.name for folder in iter_mesh_dirs(main_config_path)}
+    
     # Find all restart folders
-    for mesh_folder in restart_config_path.iterdir():
-        if mesh_folder.is_dir() and not mesh_folder.name.startswith('.'):
-            target_mesh_folder = main_config_path / mesh_folder.name
+    for mesh_folder in iter_mesh_dirs(restart_config_path):
+        target_mesh_folder = main_config_path / mesh_folder.name
+        
+        if mesh_folder.name in keep_names:
+            # Its restart.dat is the output of a run that will be reused
+            print(f"Keeping restart output of the previous run in {target_mesh_folder}")
+        elif mesh_folder.name in target_names:
+            print(f"Copying files to {target_mesh_folder}")
             
-            if target_mesh_folder.exists():
-                print(f"Copying files to {target_mesh_folder}")
-                
-                # Copy restart file
-                restart_files = list(mesh_folder.glob("*.dat"))
-                for restart_file in restart_files:
-                    shutil.copy2(restart_file, target_mesh_folder)
-            else: 
-                print(f"Error: Target folder does not exist — {target_mesh_folder}") 
-                return False
+            # Copy restart file
+            restart_files = list_files(mesh_folder, RESTART_EXTENSIONS)
+            for restart_file in restart_files:
+                copy_detached(restart_file, target_mesh_folder)
+        else: 
+            print(f"Error: Target folder does not exist — {target_mesh_folder}") 
+            return False
     
     return True
 
@@ -93,14 +213,50 @@ def copy_config_to_meshes(config_path, mesh_folders):
         return False
     
     for mesh_folder in mesh_folders:
-        if mesh_folder.is_dir() and not mesh_folder.name.startswith('.'):
-            target_config = mesh_folder / "Config.cfg"
-            shutil.copy2(config_file, target_config)
-            print(f"Copied config to {mesh_folder.name}")
+        target_config = mesh_folder / "Config.cfg"
+        shutil.copy2(config_file, target_config)
+        print(f"Copied config to {mesh_folder.name}")
     
     return True
 
-def run_su2_simulation(mesh_folder):
+def su2_output_signature(mesh_folder):
+    """Return the (mtime_ns, size) of each SU2 output file in a mesh folder,
+    or None if any of them is missing"""
+    signature = {}
+    for name in SU2_OUTPUT_FILES:
+        try:
+            stat = (mesh_folder / name).stat()
+        except FileNotFoundError:
+            return None
+        signature[name] = (stat.st_mtime_ns, stat.st_size)
+    return signature
+
+def simulation_up_to_date(mesh_folder, config_file):
+    """Check whether SU2 last completed in a mesh folder after the config and
+    mesh files were changed, and its output is still the one it wrote"""
+    done_marker = mesh_folder / SU2_DONE_MARKER
+    try:
+        done_mtime = done_marker.stat().st_mtime_ns
+        recorded = {}
+        for line in done_marker.read_text().splitlines():
+            name, mtime_ns, size = line.split()
+            recorded[name] = (int(mtime_ns), int(size))
+        input_mtimes = [config_file.stat().st_mtime_ns]
+    except (OSError, ValueError):
+        return False
+    
+    # Output that was deleted (e.g. by the workflow's cleanup) or overwritten
+    # since the run no longer matches what the marker recorded
+    if su2_output_signature(mesh_folder) != recorded:
+        return False
+    
+    with os.scandir(mesh_folder) as entries:
+        for entry in entries:
+            if entry.name.endswith(MESH_EXTENSIONS):
+                input_mtimes.append(entry.stat().st_mtime_ns)
+    return done_mtime > max(input_mtimes)
+
+def run_su2_simulation(mesh_folder, timeout=None, abort=None):
     """Run SU2 simulation in a mesh folder"""
     config_file = mesh_folder / "Config.cfg"
     
@@ -108,15 +264,30 @@ def run_su2_simulation(mesh_folder):
         print(f"Config file not found in {mesh_folder}")
         return False
     
+    # A run that is interrupted or fails must not look complete next time
+    done_marker = mesh_folder / SU2_DONE_MARKER
+    done_marker.unlink(missing_ok=True)
+    
     print(f"Running SU2 simulation in {mesh_folder.name}")
     
     # Run SU2_CFD
-    cmd = f"SU2_CFD Config.cfg"
-    result = run_command(cmd, cwd=mesh_folder)
+    cmd = ["SU2_CFD", "Config.cfg"]
+    log_path = mesh_folder / "su2.log"
+    # Keep an OpenMP-enabled SU2 from claiming every core while runs share the machine
+    env = dict(os.environ, OMP_NUM_THREADS=str(SU2_THREADS_PER_RUN))
     
-    if result is not None:
+    result = run_monitored_command(cmd, log_path, cwd=mesh_folder, timeout=timeout,
+                                   env=env, abort=abort)
+    if result:
+        signature = su2_output_signature(mesh_folder)
+        if signature is not None:
+            done_marker.write_text("".join(f"{name} {mtime_ns} {size}\n"
+                                           for name, (mtime_ns, size) in signature.items()))
         print(f"  Simulation completed for {mesh_folder.name}")
         return True
+    elif result is None:
+        print(f"  Simulation cancelled for {mesh_folder.name}")
+        return False
     else:
         print(f"  Simulation failed for {mesh_folder.name}")
         return False
@@ -130,10 +301,10 @@ def run_plot_script(config_path):
         return False
     
     print(f"Running Plot.py in {config_path}")
-    cmd = f"python3 Plot.py"
-    result = run_command(cmd, cwd=config_path)
+    cmd = [sys.executable, "Plot.py"]
+    log_path = config_path / "plot.log"
     
-    if result is not None:
+    if run_monitored_command(cmd, log_path, cwd=config_path):
         print("  Plots generated successfully")
         return True
     else:
@@ -147,20 +318,28 @@ def collect_results(config_path, output_path):
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # Find all mesh folders
-    mesh_folders = [d for d in config_path.iterdir() if d.is_dir() and not d.name.startswith('.')]
+    mesh_folders = iter_mesh_dirs(config_path)
     
     # Copy results from each mesh folder
     for mesh_folder in mesh_folders:
         mesh_result_dir = output_dir / mesh_folder.name
         mesh_result_dir.mkdir(exist_ok=True)
         
-        # Copy simulation results
-        for pattern in ['*.csv', '*.vtu', '*.cfg', '*.dat', '*.su2']:
-            for file in mesh_folder.glob(pattern):
-                shutil.copy2(file, mesh_result_dir)
+        # Copy simulation results. Only meshes may be hard-linked: they are
+        # replaced rather than rewritten, while every other result file is
+        # written in place by the next run and would change the collected copy
+        for file in list_files(mesh_folder, RESULT_EXTENSIONS):
+            if file.name.endswith(MESH_EXTENSIONS):
+                fast_copy(file, mesh_result_dir, preserve_metadata=False)
+            else:
+                copy_detached(file, mesh_result_dir)
         
         print(f"Collected results from {mesh_folder.name}")
     
+    plot_log = config_path / "plot.log"
+    if plot_log.exists():
+        copy_detached(plot_log, output_dir)
+    
     # Copy plots
     plots_dir = config_path / "plots"
     if plots_dir.exists():
@@ -180,6 +359,10 @@ def main():
     parser.add_argument('--restart-path', required=True, help='Restart repository path')
     parser.add_argument('--main-path', required=True, help='Main repository path')
     parser.add_argument('--output-path', required=True, help='Output path for results')
+    parser.add_argument('--su2-timeout', type=float, default=None,
+                        help='Maximum seconds per SU2 simulation (default: no limit)')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-run SU2 even where an earlier run is newer than its inputs')
     
     args = parser.parse_args()
     
@@ -194,25 +377,58 @@ def main():
         print("Failed to copy files from Mesh repository")
         return 1
     
+    # Decide which runs can be reused before Step 2 overwrites their restart output.
+    # Step 3 copies Config.cfg with its mtime, so the configuration's copy is checked
+    mesh_folders = iter_mesh_dirs(config_path)
+    if args.force:
+        up_to_date = set()
+    else:
+        up_to_date = {mesh_folder.name for mesh_folder in mesh_folders
+                      if simulation_up_to_date(mesh_folder, config_path / "Config.cfg")}
+    
     # Step 2: Copy Restart from Google Drive
     print("Step 2: Copying Restart files...")
-    if not copy_files_restart(args.restart_path, args.main_path, args.configuration):
+    if not copy_files_restart(args.restart_path, args.main_path, args.configuration,
+                              keep_names=up_to_date):
         print("Failed to copy files from Restart repository")
         return 1
     
     # Step 3: Copy config to mesh folders
     print("Step 3: Copying configuration to mesh folders...")
-    mesh_folders = [d for d in config_path.iterdir() if d.is_dir() and not d.name.startswith('.')]
     if not copy_config_to_meshes(config_path, mesh_folders):
         print("Failed to copy configuration files")
         return 1
     
     # Step 4: Run SU2 simulations
     print("Step 4: Running SU2 simulations...")
+    # Each mesh is an independent SU2_CFD process, so run them side by side
+    max_workers = max(1, (os.cpu_count() or 1) // SU2_THREADS_PER_RUN)
     simulation_success = True
-    for mesh_folder in mesh_folders:
-        if not run_su2_simulation(mesh_folder):
-            simulation_success = False
+    abort = threading.Event()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(mesh_folders) or 1)) as executor:
+        futures = []
+        try:
+            for mesh_folder in mesh_folders:
+                if mesh_folder.name in up_to_date:
+                    print(f"Skipping SU2 simulation in {mesh_folder.name}: results are newer than its inputs")
+                    continue
+                futures.append(executor.submit(run_su2_simulation, mesh_folder,
+                                               timeout=args.su2_timeout, abort=abort))
+            for future in as_completed(futures):
+                if future.cancelled() or future.result():
+                    continue
+                # One failure fails the whole run, so stop the remaining simulations now
+                simulation_success = False
+                abort.set()
+                for pending in futures:
+                    pending.cancel()
+        except BaseException:
+            # Runs live in their own sessions and miss the terminal's Ctrl-C, so an
+            # interrupt or a crashed worker must kill them before the pool is joined
+            abort.set()
+            for pending in futures:
+                pending.cancel()
+            raise
     
     if not simulation_success:
         print("Some simulations failed.")
@@ -0,0 +1,300 @@
+# Velocity profile plots for the 2DML mixing layer case, shared by the Plot.py of
+# every 2DML turbulence model and configuration. The constants below (x stations,
+# delta_omega, U1 and Delta U) are specific to this case.
+import pyvista as pv
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Plots are only written to files, so skip GUI backend setup
+import matplotlib.pyplot as plt
+import pandas as pd
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+# Define delta_omega at module level so it's accessible everywhere
+DELTA_OMEGA = {1:5.236, 50:8.8583, 200:13.771, 650:35.894, 950:50.547}
+
+# Tecplot zone header in exp_data.dat, e.g. ZONE T="x =50mm", possibly indented;
+# group 1 is the title. Compiled once and matched on raw bytes so the file is never decoded
+ZONE_RE = re.compile(rb'^[ \t]*ZONE T="([^"]*)".*$', re.M)
+
+# Sampled profiles are cached next to each solution so unchanged VTUs are not re-read
+PROFILE_CACHE_NAME = ".profile_cache.npz"
+
+def parse_zone_rows(body):
+    # Row-by-row fallback that skips non-numeric and short lines, e.g. a
+    # Tecplot "I=179, J=1, F=POINT" continuation of the zone header
+    rows = []
+    for line in body.splitlines():
+        try:
+            parts = [float(part) for part in line.split()]
+        except ValueError:
+            continue
+        if len(parts) >= 5:
+            rows.append((parts[1], parts[2], parts[4]))
+    return np.array(rows, dtype=float).reshape(-1, 3)
+
+def load_exp_data(config_path):
+    exp_data = {}
+    exp_file = config_path / "exp_data.dat"
+    
+    if not exp_file.exists():
+        print(f"Error: Experimental data file not found at {exp_file}")
+        return None
+        
+    try:
+        data = exp_file.read_bytes()
+        
+        # Splitting on a capturing pattern alternates zone titles and zone bodies
+        blocks = ZONE_RE.split(data)
+        for zone_title, body in zip(blocks[1::2], blocks[2::2]):
+            try:
+                # More robust x-position extraction
+                x_str = zone_title.split(b'=')[-1].replace(b'mm', b'').strip()
+                current_x = int(float(x_str))
+            except ValueError:
+                print(f"Warning: Couldn't parse x-position from zone: {zone_title.decode(errors='replace')}")
+                continue
+            
+            if not body.strip():
+                continue
+            # Parse the whole zone in C; columns are X, Y, U, Y/deltaw, (U-U1)/DeltaU
+            try:
+                zone_data = np.loadtxt(io.BytesIO(body), comments=('#', 'VARIABLES'),
+                                       usecols=(1, 2, 4), ndmin=2)
+            except ValueError:
+                zone_data = parse_zone_rows(body.decode(errors='replace'))
+            if len(zone_data):
+                # Wrap the float64 array as-is: no dtype inference, no copy
+                exp_df = pd.DataFrame(zone_data, copy=False,
+                                      columns=["Y_mm", "U_m_s", "U_norm"])
+                if current_x in DELTA_OMEGA:
+                    # Normalised once here instead of on every plot
+                    exp_df['Y_norm'] = zone_data[:, 0] / DELTA_OMEGA[current_x]
+                exp_data[current_x] = exp_df
+            
+        print(f"Loaded experimental data for x-positions: {list(exp_data.keys())}")
+        return exp_data
+        
+    except Exception as e:
+        print(f"Error loading experimental data: {str(e)}")
+        return None
+
+def load_profile_cache(cache_path, solution_stat, x_positions_mm):
+    # Only reuse profiles sampled from this exact solution file
+    try:
+        with np.load(cache_path) as cache:
+            if (int(cache['mtime_ns']) != solution_stat.st_mtime_ns
+                    or int(cache['size']) != solution_stat.st_size
+                    or cache['x_positions_mm'].tolist() != x_positions_mm):
+                return None
+            return {x_mm: {'y_mm': cache[f'y_mm_{x_mm}'], 'u': cache[f'u_{x_mm}']}
+                    for x_mm in x_positions_mm}
+    except Exception:
+        # Missing, truncated or otherwise unreadable: sample the VTU again
+        return None
+
+def save_profile_cache(cache_path, solution_stat, profiles):
+    arrays = {
+        'mtime_ns': solution_stat.st_mtime_ns,
+        'size': solution_stat.st_size,
+        'x_positions_mm': list(profiles)
+    }
+    for x_mm, profile in profiles.items():
+        arrays[f'y_mm_{x_mm}'] = profile['y_mm']
+        arrays[f'u_{x_mm}'] = profile['u']
+    
+    # Write beside the cache and rename it into place, so an interrupted or
+    # failed write never leaves a partial cache behind
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        tmp_path.unlink(missing_ok=True)
+        print(f"Warning: Could not write profile cache {cache_path}: {str(e)}")
+
+def process_mesh(config_path, mesh, x_positions_mm):
+    x_positions_m = [x/1000 for x in x_positions_mm]
+    path = config_path / mesh / "vol_solution.vtu"
+    print(f"Processing: {path}")
+    
+    # One stat both checks for the solution and keys the profile cache
+    try:
+        solution_stat = path.stat()
+    except FileNotFoundError:
+        print(f"Warning: Solution file not found at {path}")
+        return None
+        
+    try:
+        cache_path = path.parent / PROFILE_CACHE_NAME
+        profiles = load_profile_cache(cache_path, solution_stat, x_positions_mm)
+        
+        if profiles is None:
+            # Only Velocity is probed, so skip parsing every other solution field
+            reader = pv.get_reader(path)
+            if 'Velocity' not in reader.point_array_names:
+                print(f"Warning: Velocity data not found in {path}")
+                return None
+            reader.disable_all_point_arrays()
+            reader.disable_all_cell_arrays()
+            reader.enable_point_array('Velocity')
+            mesh_data = reader.read()
+
+            # Probe all x positions in one pass: a single locator build and
+            # probe filter instead of one sample_over_line per position
+            y_line = np.linspace(-0.05, 0.05, 301)  # 300 segments, as before
+            probe_points = np.vstack([
+                np.column_stack([np.full_like(y_line, x_m), y_line, np.zeros_like(y_line)])
+                for x_m in x_positions_m
+            ])
+            sampled = pv.PolyData(probe_points).sample(mesh_data)
+            y_mm = sampled.points[:, 1].reshape(len(x_positions_mm), -1) * 1000  # Convert to mm
+            # Take u from the sampled Velocity vectors rather than adding a
+            # full-volume U array to the mesh just to probe 1500 points of it
+            u = np.asarray(sampled['Velocity'])[:, 0].reshape(len(x_positions_mm), -1)
+            
+            profiles = {}
+            for i, x_mm in enumerate(x_positions_mm):
+                profiles[x_mm] = {
+                    'y_mm': y_mm[i],
+                    'u': u[i]
+                }
+            save_profile_cache(cache_path, solution_stat, profiles)
+        else:
+            print(f"Using cached profiles for {mesh}")
+        
+        # Normalize after caching so the cache holds only raw sampled values
+        mesh_results = {}
+        for x_mm, profile in profiles.items():
+            # Divide in place on the fresh difference array to skip a temporary
+            u_norm = np.subtract(profile['u'], 22.40)
+            u_norm /= 19.14
+            mesh_results[x_mm] = {
+                'y_norm': profile['y_mm'] / DELTA_OMEGA[x_mm],
+                'u_norm': u_norm
+            }
+        return mesh_results
+            
+    except Exception as e:
+        print(f"Error processing {mesh}: {str(e)}")
+        return None
+
+def process_simulation_data(config_path, mesh_dirs):
+    results = {}
+    x_positions_mm = [1, 50, 200, 650, 950]
+    
+    # Meshes are read and probed independently, so spread them over processes
+    max_workers = max(1, min(len(mesh_dirs), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        mesh_results = executor.map(process_mesh, repeat(config_path), mesh_dirs,
+                                    repeat(x_positions_mm))
+        for mesh, mesh_result in zip(mesh_dirs, mesh_results):
+            if mesh_result is not None:
+                results[mesh] = mesh_result
+            
+    return results
+
+# Drop vertices closer than a pixel to the stroked line; the profiles are smooth.
+# Scoped to the plotting so importers of this module keep their own rcParams
+@plt.rc_context({'path.simplify_threshold': 1.0})
+def create_plots(exp_data, sim_results, output_dir, model_name):
+    mesh_dirs = list(sim_results.keys())
+    x_positions_mm = [1, 50, 200, 650, 950]
+    mesh_colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd']
+    exp_style = {'marker':'o', 'color':'k', 's':20, 'linewidths':1, 'zorder':10, 'facecolors':'none'}
+    
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # One figure is reused for every x position; clearing the axes is much
+    # cheaper than building and tearing down a new figure and canvas each time
+    fig, ax = plt.subplots(figsize=(10, 6))
+    # Fixed margins replace bbox_inches='tight', which renders every figure twice
+    fig.subplots_adjust(left=0.12, right=0.97, top=0.93, bottom=0.12)
+    
+    for x_mm in x_positions_mm:
+        ax.clear()
+        
+        # Plot simulation results first
+        for mesh, color in zip(mesh_dirs, mesh_colors):
+            if mesh in sim_results and x_mm in sim_results[mesh]:
+                data = sim_results[mesh][x_mm]
+                ax.plot(data['u_norm'], data['y_norm'],
+                        label=f"Mesh {mesh}",
+                        color=color,
+                        linewidth=2,
+                        alpha=0.8)
+        
+        # Plot experimental data on top
+        if exp_data is not None and x_mm in exp_data:
+            exp_df = exp_data[x_mm]
+            print(f"Experimental data points for x={x_mm}mm:\n{exp_df}")
+            
+            ax.scatter(exp_df['U_norm'], 
+                       exp_df['Y_norm'],
+                       label='Experimental',
+                       **exp_style)
+        else:
+            print(f"Warning: No experimental data for x={x_mm}mm")
+        
+        ax.set_xlabel(r"$(U-U_1)/\Delta U$", fontsize=12)
+        ax.set_ylabel(r"$y/\delta_\omega$", fontsize=12)
+        ax.set_title(f"Mixing Layer Profile at x = {x_mm} mm For {model_name} Model", fontsize=14)
+        ax.grid(True, linestyle=':', alpha=0.5)
+        ax.legend(fontsize=10, framealpha=1)
+        
+        output_path = os.path.join(output_dir, f"profile_x{x_mm}mm.png")
+        fig.savefig(output_path, dpi=150)
+        print(f"Saved: {output_path}")
+    
+    plt.close(fig)
+
+def run(config_path, model_name):
+    try:
+        config_path = Path(config_path)
+        print(f"Configuration directory: {config_path}")
+    
+        # Find all mesh directories
+        # scandir entries carry the file type, so is_dir() needs no extra stat.
+        # Sorted so meshes keep the same order and colours on every filesystem
+        with os.scandir(config_path) as entries:
+            mesh_dirs = sorted(entry.name for entry in entries
+                               if entry.is_dir() and not entry.name.startswith('.'))
+        print(f"Found mesh directories: {mesh_dirs}")
+    
+        if not mesh_dirs:
+            print("Error: No mesh directories found")
+            return False
+        
+        # Load experimental data with more verbose logging
+        print("\nLoading experimental data...")
+        exp_data = load_exp_data(config_path)
+        if exp_data is None:
+            print("Warning: Could not load experimental data, will proceed without it")
+        else:
+            print("Successfully loaded experimental data")
+    
+        # Process simulation data
+        print("\nProcessing simulation data...")
+        sim_results = process_simulation_data(config_path, mesh_dirs)
+        if not sim_results:
+            print("Error: No simulation data processed")
+            return False
+        
+        # Create plots directory
+        plots_dir = config_path / "plots"
+    
+        # Generate plots with more verbose logging
+        print("\nGenerating plots...")
+        create_plots(exp_data, sim_results, plots_dir, model_name)
+    
+        print("\nAll plots generated successfully!")
+        return True
+    
+    except Exception as e:
+        print(f"Fatal error: {str(e)}")
+        return False